@@ -0,0 +1,246 @@
+import numpy as np
+from numba import config, njit, prange
+
+# Numba ports of the candlestick.patterns finders used by the app. detect_all
+# takes the open/high/low/close arrays and fills one boolean column per
+# pattern with the same rules as the matching CandlestickFinder.logic(); bars
+# without enough history are False (the library reports them as None).
+#
+# error_model='numpy' keeps the library's float semantics on zero-range bars
+# (x / 0 gives inf or nan instead of raising). fastmath is left off on purpose:
+# its no-NaN assumption would change how those comparisons evaluate.
+
+_jit = njit(cache=True, error_model='numpy')
+
+# Streamlit runs sessions on concurrent threads, so detect_all needs a
+# thread-safe layer; OpenMP goes first since TBB's workers can keep the
+# interpreter from exiting.
+config.THREADING_LAYER_PRIORITY = ['omp', 'tbb', 'workqueue']
+
+
+# ----- Per-bar predicates -----
+@_jit
+def _bearish_engulfing(o, h, l, c, i):
+    return (o[i] >= c[i - 1] > o[i - 1] and
+            o[i] > c[i] and
+            o[i - 1] >= c[i] and
+            o[i] - c[i] > c[i - 1] - o[i - 1])
+
+
+@_jit
+def _bearish_harami(o, h, l, c, i):
+    return (c[i - 1] > o[i - 1] and
+            o[i - 1] <= c[i] < o[i] <= c[i - 1] and
+            o[i] - c[i] < c[i - 1] - o[i - 1])
+
+
+@_jit
+def _bullish_engulfing(o, h, l, c, i):
+    return (c[i] >= o[i - 1] > c[i - 1] and
+            c[i] > o[i] and
+            c[i - 1] >= o[i] and
+            c[i] - o[i] > o[i - 1] - c[i - 1])
+
+
+@_jit
+def _bullish_harami(o, h, l, c, i):
+    return (o[i - 1] > c[i - 1] and
+            c[i - 1] <= o[i] < c[i] <= o[i - 1] and
+            c[i] - o[i] < o[i - 1] - c[i - 1])
+
+
+@_jit
+def _dark_cloud_cover(o, h, l, c, i):
+    return ((c[i - 1] > o[i - 1]) and
+            (((c[i - 1] + o[i - 1]) / 2) > c[i]) and
+            (o[i] > c[i]) and
+            (o[i] > c[i - 1]) and
+            (c[i] > o[i - 1]) and
+            ((o[i] - c[i]) / (.001 + (h[i] - l[i])) > 0.6))
+
+
+@_jit
+def _doji(o, h, l, c, i):
+    body = abs(c[i] - o[i])
+    return (body / (h[i] - l[i]) < 0.1 and
+            (h[i] - max(c[i], o[i])) > (3 * body) and
+            (min(c[i], o[i]) - l[i]) > (3 * body))
+
+
+@_jit
+def _doji_star(o, h, l, c, i):
+    body = abs(c[i] - o[i])
+    return (c[i - 1] > o[i - 1] and
+            abs(c[i - 1] - o[i - 1]) / (h[i - 1] - l[i - 1]) >= 0.7 and
+            body / (h[i] - l[i]) < 0.1 and
+            c[i - 1] < c[i] and
+            c[i - 1] < o[i] and
+            (h[i] - max(c[i], o[i])) > (3 * body) and
+            (min(c[i], o[i]) - l[i]) > (3 * body))
+
+
+@_jit
+def _dragonfly_doji(o, h, l, c, i):
+    body = abs(c[i] - o[i])
+    return (body / (h[i] - l[i]) < 0.1 and
+            (min(c[i], o[i]) - l[i]) > (3 * body) and
+            (h[i] - max(c[i], o[i])) < body)
+
+
+@_jit
+def _gravestone_doji(o, h, l, c, i):
+    body = abs(c[i] - o[i])
+    return (body / (h[i] - l[i]) < 0.1 and
+            (h[i] - max(c[i], o[i])) > (3 * body) and
+            (min(c[i], o[i]) - l[i]) <= body)
+
+
+@_jit
+def _hammer(o, h, l, c, i):
+    return (((h[i] - l[i]) > 3 * (o[i] - c[i])) and
+            ((c[i] - l[i]) / (.001 + h[i] - l[i]) > 0.6) and
+            ((o[i] - l[i]) / (.001 + h[i] - l[i]) > 0.6))
+
+
+@_jit
+def _hanging_man(o, h, l, c, i):
+    return (((h[i] - l[i] > 4 * (o[i] - c[i])) and
+             ((c[i] - l[i]) / (.001 + h[i] - l[i]) >= 0.75) and
+             ((o[i] - l[i]) / (.001 + h[i] - l[i]) >= 0.75)) and
+            h[i - 1] < o[i] and
+            h[i - 2] < o[i])
+
+
+@_jit
+def _inverted_hammer(o, h, l, c, i):
+    return (((h[i] - l[i]) > 3 * (o[i] - c[i])) and
+            ((h[i] - c[i]) / (.001 + h[i] - l[i]) > 0.6) and
+            ((h[i] - o[i]) / (.001 + h[i] - l[i]) > 0.6))
+
+
+@_jit
+def _morning_star(o, h, l, c, i):
+    return (max(o[i - 1], c[i - 1]) < c[i - 2] < o[i - 2] and
+            c[i] > o[i] > max(o[i - 1], c[i - 1]))
+
+
+@_jit
+def _morning_star_doji(o, h, l, c, i):
+    prev_body = abs(c[i - 1] - o[i - 1])
+    return (c[i - 2] < o[i - 2] and
+            abs(c[i - 2] - o[i - 2]) / (h[i - 2] - l[i - 2]) >= 0.7 and
+            prev_body / (h[i - 1] - l[i - 1]) < 0.1 and
+            c[i] > o[i] and
+            abs(c[i] - o[i]) / (h[i] - l[i]) >= 0.7 and
+            c[i - 2] > c[i - 1] and
+            c[i - 2] > o[i - 1] and
+            c[i - 1] < o[i] and
+            o[i - 1] < o[i] and
+            c[i] > c[i - 2] and
+            (h[i - 1] - max(c[i - 1], o[i - 1])) > (3 * prev_body) and
+            (min(c[i - 1], o[i - 1]) - l[i - 1]) > (3 * prev_body))
+
+
+@_jit
+def _piercing_pattern(o, h, l, c, i):
+    return (c[i - 1] < o[i - 1] and
+            o[i] < l[i - 1] and
+            o[i - 1] > c[i] > c[i - 1] + ((o[i - 1] - c[i - 1]) / 2))
+
+
+@_jit
+def _rain_drop(o, h, l, c, i):
+    return (c[i - 1] < o[i - 1] and
+            abs(c[i - 1] - o[i - 1]) / (h[i - 1] - l[i - 1]) >= 0.7 and
+            0.3 > abs(c[i] - o[i]) / (h[i] - l[i]) >= 0.1 and
+            c[i - 1] > c[i] and
+            c[i - 1] > o[i])
+
+
+@_jit
+def _rain_drop_doji(o, h, l, c, i):
+    body = abs(c[i] - o[i])
+    return (c[i - 1] < o[i - 1] and
+            abs(c[i - 1] - o[i - 1]) / (h[i - 1] - l[i - 1]) >= 0.7 and
+            body / (h[i] - l[i]) < 0.1 and
+            c[i - 1] > c[i] and
+            c[i - 1] > o[i] and
+            (h[i] - max(c[i], o[i])) > (3 * body) and
+            (min(c[i], o[i]) - l[i]) > (3 * body))
+
+
+@_jit
+def _shooting_star(o, h, l, c, i):
+    body = abs(o[i] - c[i])
+    return (o[i - 1] < c[i - 1] < o[i] and
+            h[i] - max(o[i], c[i]) >= body * 3 and
+            min(c[i], o[i]) - l[i] <= body)
+
+
+@_jit
+def _star(o, h, l, c, i):
+    return (c[i - 1] > o[i - 1] and
+            abs(c[i - 1] - o[i - 1]) / (h[i - 1] - l[i - 1]) >= 0.7 and
+            0.3 > abs(c[i] - o[i]) / (h[i] - l[i]) >= 0.1 and
+            c[i - 1] < c[i] and
+            c[i - 1] < o[i])
+
+
+# ----- Columns -----
+# Column order of the detect_all() output matrix, named after the library
+# finders; the constants are the matching column indices.
+PATTERNS = ('bearish_engulfing', 'bearish_harami', 'bullish_engulfing', 'bullish_harami',
+            'dark_cloud_cover', 'doji', 'doji_star', 'dragonfly_doji', 'gravestone_doji',
+            'hammer', 'hanging_man', 'inverted_hammer', 'morning_star', 'morning_star_doji',
+            'piercing_pattern', 'rain_drop', 'rain_drop_doji', 'shooting_star', 'star')
+
+(BEARISH_ENGULFING, BEARISH_HARAMI, BULLISH_ENGULFING, BULLISH_HARAMI,
+ DARK_CLOUD_COVER, DOJI, DOJI_STAR, DRAGONFLY_DOJI, GRAVESTONE_DOJI,
+ HAMMER, HANGING_MAN, INVERTED_HAMMER, MORNING_STAR, MORNING_STAR_DOJI,
+ PIERCING_PATTERN, RAIN_DROP, RAIN_DROP_DOJI, SHOOTING_STAR, STAR) = range(len(PATTERNS))
+
+
+# ----- Fused detector -----
+# Evaluates every pattern for a bar while its OHLC values are hot, writing
+# one (n, len(PATTERNS)) row per bar; bars are split across threads.
+@njit(parallel=True, cache=True, error_model='numpy')
+def detect_all(o, h, l, c, out):
+    for i in prange(len(c)):
+        out[i, DOJI] = _doji(o, h, l, c, i)
+        out[i, DRAGONFLY_DOJI] = _dragonfly_doji(o, h, l, c, i)
+        out[i, GRAVESTONE_DOJI] = _gravestone_doji(o, h, l, c, i)
+        out[i, HAMMER] = _hammer(o, h, l, c, i)
+        out[i, INVERTED_HAMMER] = _inverted_hammer(o, h, l, c, i)
+        if i >= 1:
+            out[i, BEARISH_ENGULFING] = _bearish_engulfing(o, h, l, c, i)
+            out[i, BEARISH_HARAMI] = _bearish_harami(o, h, l, c, i)
+            out[i, BULLISH_ENGULFING] = _bullish_engulfing(o, h, l, c, i)
+            out[i, BULLISH_HARAMI] = _bullish_harami(o, h, l, c, i)
+            out[i, DARK_CLOUD_COVER] = _dark_cloud_cover(o, h, l, c, i)
+            out[i, DOJI_STAR] = _doji_star(o, h, l, c, i)
+            out[i, PIERCING_PATTERN] = _piercing_pattern(o, h, l, c, i)
+            out[i, RAIN_DROP] = _rain_drop(o, h, l, c, i)
+            out[i, RAIN_DROP_DOJI] = _rain_drop_doji(o, h, l, c, i)
+            out[i, SHOOTING_STAR] = _shooting_star(o, h, l, c, i)
+            out[i, STAR] = _star(o, h, l, c, i)
+        if i >= 2:
+            out[i, HANGING_MAN] = _hanging_man(o, h, l, c, i)
+            out[i, MORNING_STAR] = _morning_star(o, h, l, c, i)
+            out[i, MORNING_STAR_DOJI] = _morning_star_doji(o, h, l, c, i)
+
+
+# ----- Warmup -----
+# Compile (or load from the on-disk cache) at import time so the first
+# detection a user triggers doesn't pay for JIT compilation. The app loads
+# OHLC as float64, so that is the specialisation warmed up (both writable and
+# read-only, as pandas' copy-on-write hands out read-only arrays); other
+# dtypes still compile on first use.
+def _warmup():
+    writable = np.ones(3, dtype=np.float64)
+    readonly = writable.copy()
+    readonly.setflags(write=False)
+    for bars in (writable, readonly):
+        detect_all(bars, bars, bars, bars, np.zeros((3, len(PATTERNS)), dtype=np.bool_))
+
+
+_warmup()
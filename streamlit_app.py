@@ -1,85 +1,236 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
-import mplfinance as mpf
-from candlestick import candlestick
+import math
 from io import BytesIO
 
 # ----- Pattern dictionary -----
-pattern_functions = {
-    'BearishEngulfing (*)': candlestick.bearish_engulfing,
-    'BearishHarami (*)': candlestick.bearish_harami,
-    'BullishEngulfing (*)': candlestick.bullish_engulfing,
-    'BullishHarami (*)': candlestick.bullish_harami,
-    'DarkCloudCover (*)': candlestick.dark_cloud_cover,
-    'Doji (*)': candlestick.doji,
-    'DojiStar (*)': candlestick.doji_star,
-    'DragonflyDoji (*)': candlestick.dragonfly_doji,
-    'GravestoneDoji (*)': candlestick.gravestone_doji,
-    'Hammer': candlestick.hammer,
-    'HangingMan (*)': candlestick.hanging_man,
-    'InvertedHammers (*)': candlestick.inverted_hammer,
-    'MorningStar': candlestick.morning_star,
-    'MorningStarDoji (*)': candlestick.morning_star_doji,
-    'PiercingPattern (*)': candlestick.piercing_pattern,
-    'RainDrop (*)': candlestick.rain_drop,
-    'RainDropDoji (*)': candlestick.rain_drop_doji,
-    'ShootingStar (*)': candlestick.shooting_star,
-    'Star (*)': candlestick.star
+# Maps each label to its patterns_numba.PATTERNS name. Kept as plain data so
+# the first render doesn't wait on patterns_numba; it is only imported (and
+# its kernels warmed up) by the first detection.
+PATTERN_NAMES = {
+    'BearishEngulfing (*)': 'bearish_engulfing',
+    'BearishHarami (*)': 'bearish_harami',
+    'BullishEngulfing (*)': 'bullish_engulfing',
+    'BullishHarami (*)': 'bullish_harami',
+    'DarkCloudCover (*)': 'dark_cloud_cover',
+    'Doji (*)': 'doji',
+    'DojiStar (*)': 'doji_star',
+    'DragonflyDoji (*)': 'dragonfly_doji',
+    'GravestoneDoji (*)': 'gravestone_doji',
+    'Hammer': 'hammer',
+    'HangingMan (*)': 'hanging_man',
+    'InvertedHammers (*)': 'inverted_hammer',
+    'MorningStar': 'morning_star',
+    'MorningStarDoji (*)': 'morning_star_doji',
+    'PiercingPattern (*)': 'piercing_pattern',
+    'RainDrop (*)': 'rain_drop',
+    'RainDropDoji (*)': 'rain_drop_doji',
+    'ShootingStar (*)': 'shooting_star',
+    'Star (*)': 'star'
 }
 
 EXAMPLE_CSV_DIR = "example_csvs"
+OHLC_COLUMNS = ['open', 'high', 'low', 'close']
+OHLCV_COLUMNS = OHLC_COLUMNS + ['volume']
 
 
 # ----- Load CSV into DataFrame -----
-def load_ohlcv_data(file_path_or_obj):
-    df = pd.read_csv(file_path_or_obj)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], dayfirst=True)
+TIMESTAMP_FORMAT = "%d-%m-%Y %H:%M"
+
+
+def _parse_timestamps(values):
+    # The explicit format takes pandas' fast path; anything else falls back
+    # to the slower day-first inference.
+    try:
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT, cache=True)
+    except ValueError:
+        return pd.to_datetime(values, dayfirst=True, cache=True)
+
+
+# OHLCV stays float64. The pattern rules compare against thresholds such as
+# body * 3, which tick-rounded prices often hit exactly, and float32 rounding
+# flips those comparisons; it also stores volumes above 2**24 inexactly.
+def _parse_ohlcv(file_path_or_obj):
+    df = pd.read_csv(file_path_or_obj, engine='pyarrow',
+                     usecols=['timestamp'] + OHLCV_COLUMNS,
+                     dtype={**{col: 'float64' for col in OHLCV_COLUMNS}, 'timestamp': 'string'})
+    df['timestamp'] = _parse_timestamps(df['timestamp'])
     df.set_index('timestamp', inplace=True)
-    numeric_cols = ['open', 'high', 'low', 'close', 'volume']
-    df[numeric_cols] = df[numeric_cols].astype(float)
     return df
 
 
-# ----- Detect pattern and generate chart -----
-def detect_and_plot(df, pattern_name):
-    func = pattern_functions.get(pattern_name)
-    df = df.copy()
-    df = func(df)
+# Uploads are cached on their raw bytes, example files on path + mtime,
+# so reruns (slider drags, pattern changes) skip the CSV parse entirely.
+@st.cache_data(show_spinner=False)
+def _load_from_bytes(raw):
+    return _parse_ohlcv(BytesIO(raw))
+
+
+@st.cache_data(show_spinner=False)
+def _load_from_path(path, mtime):
+    return _parse_ohlcv(path)
+
+
+def load_ohlcv_data(file_path_or_obj):
+    if isinstance(file_path_or_obj, str):
+        return _load_from_path(file_path_or_obj, os.path.getmtime(file_path_or_obj))
+    return _load_from_bytes(file_path_or_obj.getvalue())
+
+
+# ----- List example CSVs -----
+@st.cache_data(ttl=300, show_spinner=False)
+def list_examples(dir_):
+    with os.scandir(dir_) as entries:
+        return sorted(e.name for e in entries if e.is_file() and e.name.endswith(".csv"))
+
+
+# ----- Detect all patterns -----
+# The loaded frame is split once into plain arrays (OHLCV plus 'timestamp');
+# everything downstream slices those as zero-copy views instead of building
+# DataFrames per interaction. Every pattern is evaluated once per dataset in
+# a single fused pass, so switching patterns or ranges is just a lookup.
+# Alongside, a running match count per pattern (with a leading 0) answers
+# "any match in rows a..b?" in O(1).
+@st.cache_data(show_spinner="Detecting candlestick patterns...")
+def compute_all_patterns(df):
+    import patterns_numba
+
+    bars = {col: df[col].to_numpy() for col in OHLCV_COLUMNS}
+    bars['timestamp'] = df.index.to_numpy()
+    hits = np.zeros((len(df), len(patterns_numba.PATTERNS)), dtype=bool)
+    patterns_numba.detect_all(*(bars[col] for col in OHLC_COLUMNS), hits)
+    masks = {label: hits[:, patterns_numba.PATTERNS.index(name)] for label, name in PATTERN_NAMES.items()}
+    match_counts = {name: np.concatenate(([0], np.cumsum(mask))) for name, mask in masks.items()}
+    return bars, masks, match_counts
+
+
+def slice_bars(bars, start_row, end_row):
+    return {col: values[start_row:end_row + 1] for col, values in bars.items()}
+
 
-    if pattern_name not in df.columns or df[pattern_name].sum() == 0:
+def count_matches(match_counts, pattern_name, start_row, end_row):
+    counts = match_counts[pattern_name]
+    return int(counts[end_row + 1] - counts[start_row])
+
+
+# ----- Generate chart -----
+UP_COLOR, DOWN_COLOR = '#006340', '#a02128'
+EXPORT_SIZE = dict(width=1280, height=720)
+
+
+# The modebar's "Download plot" button exports the chart in the browser, so
+# downloads need no server-side renderer. Exports render at 1x by default
+# and HiDPI doubles the pixel density; WebP gives smaller files than PNG.
+def get_optimised_chart_config(file_name='chart', hidpi=False):
+    return {'displaylogo': False, 'scrollZoom': True,
+            'toImageButtonOptions': dict(format='webp', filename=file_name,
+                                         scale=2 if hidpi else 1, **EXPORT_SIZE)}
+
+
+# Charts are drawn and exported client-side by plotly.js, so nothing is ever
+# rasterised on the server. plotly is imported here so page loads and slider
+# reruns never pay for it before the first Detect.
+def plot_chart(bars, mask, pattern_name):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    open_, close = bars['open'], bars['close']
+    # A category axis keeps bars adjacent across nights, weekends and
+    # holidays, like mplfinance did; a date axis leaves those gaps empty.
+    timestamp = pd.DatetimeIndex(bars['timestamp']).strftime('%Y-%m-%d %H:%M').to_numpy()
+
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.8, 0.2], vertical_spacing=0.02)
+    fig.add_trace(go.Candlestick(x=timestamp, open=open_, high=bars['high'], low=bars['low'], close=close,
+                                 increasing_line_color=UP_COLOR, decreasing_line_color=DOWN_COLOR,
+                                 name='OHLC'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=timestamp[mask], y=close[mask], mode='markers', name=pattern_name,
+                             marker=dict(symbol='square', color='yellow', size=10,
+                                         line=dict(color='black', width=1))), row=1, col=1)
+    fig.add_trace(go.Bar(x=timestamp, y=bars['volume'], name='Volume',
+                         marker_color=np.where(close >= open_, UP_COLOR, DOWN_COLOR)), row=2, col=1)
+    fig.update_layout(title=pattern_name, showlegend=False, xaxis_rangeslider_visible=False,
+                      template='plotly_white', margin=dict(l=10, r=10, t=50, b=10))
+    fig.update_xaxes(type='category')
+    fig.update_yaxes(title_text='Price', row=1, col=1)
+    fig.update_yaxes(title_text='Volume', row=2, col=1)
+    return fig
+
+
+# Above MAX_PLOT_BARS, consecutive rows are merged into OHLCV buckets so the
+# chart size stays bounded. Bucketing is by row rather than by time, so gaps
+# in the data don't matter; a bucket is marked if any of its bars matched.
+MAX_PLOT_BARS = 2000
+
+
+def downsample_ohlcv(bars, mask, max_bars=MAX_PLOT_BARS):
+    n = len(mask)
+    if n <= max_bars:
+        return bars, mask
+    step = math.ceil(n / max_bars)
+    starts = np.arange(0, n, step)
+    ends = np.minimum(starts + step, n) - 1
+    bars_plot = {
+        'timestamp': bars['timestamp'][starts],
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+    return bars_plot, np.logical_or.reduceat(mask, starts)
+
+
+# With zoom enabled only the span from the first to the last match (plus
+# ZOOM_PADDING bars either side) is plotted, however large the range.
+ZOOM_PADDING = 50
+
+
+def detect_and_plot(bars, mask, pattern_name, match_count, zoom=False):
+    if match_count == 0:
         return None, "Pattern not found in this dataset."
 
-    pattern_points = df['close'].where(df[pattern_name] == True)
-    marker_plot = mpf.make_addplot(pattern_points, type='scatter', markersize=100, marker='s', color='yellow')
+    if zoom:
+        hits = np.flatnonzero(mask)
+        lo = max(0, hits[0] - ZOOM_PADDING)
+        hi = min(len(mask) - 1, hits[-1] + ZOOM_PADDING)
+        bars, mask = slice_bars(bars, lo, hi), mask[lo:hi + 1]
+
+    bars_plot, mask_plot = downsample_ohlcv(bars, mask)
+    return plot_chart(bars_plot, mask_plot, pattern_name), None
 
-    buf = BytesIO()
-    mpf.plot(df, type='candle', style='charles', volume=True, title=pattern_name,
-             addplot=marker_plot, figratio=(16, 9), figscale=1.2,
-             savefig=dict(fname=buf, dpi=150, bbox_inches='tight', pad_inches=0.1))
-    buf.seek(0)
-    return buf, None
+
+# ----- Session data -----
+# The detection results are kept in session_state under a key identifying
+# the upload or example, so ordinary reruns skip even the st.cache_data
+# lookups (which would otherwise re-hash the file and frame).
+def get_session_data(data_key, file_path_or_obj):
+    if st.session_state.get('data_key') != data_key:
+        st.session_state.data = compute_all_patterns(load_ohlcv_data(file_path_or_obj))
+        st.session_state.data_key = data_key
+    return st.session_state.data
 
 
 # ----- UI -----
 st.title("📉 Candlestick Pattern Detector")
 
 # Pattern Selection
-pattern_name = st.selectbox("🔍 Select a Candlestick Pattern", list(pattern_functions.keys()))
+pattern_name = st.selectbox("🔍 Select a Candlestick Pattern", list(PATTERN_NAMES.keys()))
 
 # File input options
 st.markdown("### 📂 Upload Your CSV or Use an Example")
 uploaded_file = st.file_uploader("Upload OHLCV CSV", type=["csv"])
 
-example_files = [f for f in os.listdir(EXAMPLE_CSV_DIR) if f.endswith(".csv")]
+example_files = list_examples(EXAMPLE_CSV_DIR)
 example_selected = st.selectbox("...or choose an example CSV", ["None"] + example_files)
 
-df = None
+data = None
 source_label = ""
 
 if uploaded_file:
     try:
-        df = load_ohlcv_data(uploaded_file)
+        data = get_session_data(f"upload:{uploaded_file.file_id}", uploaded_file)
         source_label = uploaded_file.name
         st.success(f"✅ Uploaded file: {uploaded_file.name}")
     except Exception as e:
@@ -87,38 +238,49 @@ if uploaded_file:
 elif example_selected != "None":
     try:
         example_path = os.path.join(EXAMPLE_CSV_DIR, example_selected)
-        df = load_ohlcv_data(example_path)
+        data = get_session_data(f"example:{example_selected}:{os.path.getmtime(example_path)}",
+                                example_path)
         source_label = example_selected
         st.success(f"✅ Loaded example file: {example_selected}")
     except Exception as e:
         st.error(f"❌ Failed to load example file: {e}")
 
-if df is not None:
-    num_rows = len(df)
+if data is not None:
+    bars, masks, match_counts = data
+    num_rows = len(bars['close'])
     st.markdown(f"### 📊 Data contains {num_rows} rows.")
 
-    start_row = st.slider("Select Start Row", min_value=0, max_value=num_rows-1, value=0)
-    end_row = st.slider("Select End Row", min_value=start_row, max_value=num_rows-1, value=num_rows-1)
+    start_row, end_row = st.slider("Select Row Range", min_value=0, max_value=num_rows-1,
+                                   value=(0, num_rows-1))
+
+    bars_subset = slice_bars(bars, start_row, end_row)
 
-    df_subset = df.iloc[start_row:end_row+1]
+    zoom_to_matches = st.checkbox("🔎 Zoom to matches",
+                                  help=f"Only plot the bars around the matches (±{ZOOM_PADDING} bars).")
 
     st.markdown("---")
     if st.button("🚀 Detect Pattern"):
-        with st.spinner("Detecting pattern and generating chart..."):
-            buf, error_msg = detect_and_plot(df_subset, pattern_name)
+        with st.spinner("Generating chart..."):
+            match_count = count_matches(match_counts, pattern_name, start_row, end_row)
+            mask = masks[pattern_name][start_row:end_row+1]
+            fig, error_msg = detect_and_plot(bars_subset, mask, pattern_name, match_count,
+                                             zoom=zoom_to_matches)
         
         if error_msg:
             st.warning(error_msg)
         else:
-            st.session_state.chart_buffer = buf
+            st.session_state.chart_figure = fig
             st.session_state.chart_label = f"{pattern_name} Pattern Detected in: {source_label}"
-            st.session_state.chart_file_name = f"{pattern_name}_detected.png"
+            st.session_state.chart_file_name = f"{pattern_name}_detected"
             st.session_state.chart_download = True
 
-    if 'chart_buffer' in st.session_state:
-        st.image(st.session_state.chart_buffer, caption=st.session_state.chart_label, use_container_width=True)
+    if 'chart_figure' in st.session_state:
+        hidpi = st.session_state.chart_download and st.checkbox("High-resolution download (2x)",
+                                                                key='export_hidpi')
+        st.plotly_chart(st.session_state.chart_figure, width='stretch',
+                        config=get_optimised_chart_config(st.session_state.chart_file_name, hidpi))
+        st.caption(st.session_state.chart_label)
         if st.session_state.chart_download:
-            st.download_button("📥 Download Chart", data=st.session_state.chart_buffer, 
-                               file_name=st.session_state.chart_file_name, mime="image/png")
+            st.caption("📥 Use the camera icon in the chart toolbar to download it as an image.")
 else:
     st.info("Upload a CSV file or choose an example to continue.")
\ No newline at end of file
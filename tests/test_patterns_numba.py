@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import patterns_numba
+from candlestick import candlestick
+
+EXAMPLE_CSV_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example_csvs')
+OHLC_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+# ----- Data -----
+def load_example(name):
+    df = pd.read_csv(os.path.join(EXAMPLE_CSV_DIR, name))
+    df.index = pd.to_datetime(df['timestamp'], dayfirst=True)
+    return df[OHLC_COLUMNS].astype('float64')
+
+
+def flat_bars():
+    # Zero-range bars (open == high == low == close) divide by zero in most
+    # rules, which the kernels must evaluate exactly like the library.
+    prices = np.array([100.0, 100.0, 100.0, 101.0, 101.0, 99.0, 99.0, 99.0])
+    index = pd.date_range('2020-01-01', periods=len(prices), freq='min')
+    return pd.DataFrame({col: prices for col in OHLC_COLUMNS}, index=index)
+
+
+def mixed_flat_bars():
+    # Flat bars interleaved with ordinary ones, so multi-bar rules see both.
+    df = load_example('example1.csv').iloc[:60].copy()
+    flat = df.index[::3]
+    for col in ['open', 'high', 'low']:
+        df.loc[flat, col] = df.loc[flat, 'close']
+    return df
+
+
+DATASETS = {
+    'example1': lambda: load_example('example1.csv'),
+    'example2': lambda: load_example('example2.csv'),
+    'flat': flat_bars,
+    'mixed_flat': mixed_flat_bars,
+}
+
+
+def library_mask(finder, df):
+    return finder(df, target='hit')['hit'].fillna(False).astype(bool).to_numpy()
+
+
+# ----- Tests -----
+@pytest.fixture(scope='module', params=DATASETS, ids=list(DATASETS))
+def dataset(request):
+    df = DATASETS[request.param]()
+    hits = np.zeros((len(df), len(patterns_numba.PATTERNS)), dtype=bool)
+    patterns_numba.detect_all(*(df[col].to_numpy() for col in OHLC_COLUMNS), hits)
+    return df, hits
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('column', range(len(patterns_numba.PATTERNS)), ids=patterns_numba.PATTERNS)
+def test_kernels_match_library(dataset, column):
+    df, hits = dataset
+    # Each detect_all() column is named after the library finder it ports.
+    finder = getattr(candlestick, patterns_numba.PATTERNS[column])
+    np.testing.assert_array_equal(hits[:, column], library_mask(finder, df))